@@ -4,14 +4,23 @@ RAG-Powered Reddit Tech Problems Server
 FastAPI server with semantic search using vector embeddings
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
 from typing import Optional, List, Dict, Any
 import os
 import sys
+import asyncio
 import time
+import threading
+import hashlib
+import orjson
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Add services to path
@@ -19,33 +28,95 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 from backend.app.services.vector_store import VectorStore
 
+# Vector store for RAG, created in lifespan() before the server accepts requests
+vector_store: Optional[VectorStore] = None
+
+def _init_vector_store() -> VectorStore:
+    """Load the store, warm it up and report whether it has data"""
+    print("🚀 Initializing RAG Vector Store...")
+    store = VectorStore()
+    store.warm_up()
+    
+    # Check if vector store has data (count only - skip the category scan at boot)
+    total_docs = store.count()
+    if total_docs == 0:
+        print("⚠️  WARNING: Vector store is empty!")
+        print("💡 Run preprocessing first: python preprocess_rag.py")
+        print("🔄 Starting server anyway (will return empty results)")
+    else:
+        print(f"✅ Vector store ready with {total_docs} documents")
+    
+    return store
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global vector_store
+    # Model loading is blocking; keep it off the event loop
+    vector_store = await asyncio.to_thread(_init_vector_store)
+    yield
+
 # Create FastAPI app
-app = FastAPI(title="RAG Reddit Tech Problems API", version="2.0.0")
+app = FastAPI(title="RAG Reddit Tech Problems API", version="2.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Per-client rate limits: every search query runs the embedding model
+SEARCH_RATE_LIMIT = os.getenv("SEARCH_RATE_LIMIT", "30/minute")
+BROWSE_RATE_LIMIT = os.getenv("BROWSE_RATE_LIMIT", "120/minute")
+limiter = Limiter(key_func=get_remote_address)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# Initialize vector store for RAG
-print("🚀 Initializing RAG Vector Store...")
-vector_store = VectorStore()
+def _is_browse(request: Request) -> bool:
+    """/api/live_problems without ?query= only pages through stored documents"""
+    return not request.query_params.get("query")
+
+def _is_search(request: Request) -> bool:
+    return not _is_browse(request)
+
+# /api/status is polled by the frontend and health checks; reuse the
+# payload for a few seconds instead of recounting the collection each time,
+# and let clients revalidate with If-None-Match
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL", "5"))
+_status_cache = {"ts": 0.0, "data": None, "etag": None}
+_status_lock = threading.Lock()
+
+# Browse pages only change when the preprocessor writes to the collection, so
+# cache them keyed by the query params plus the current document count
+BROWSE_CACHE_SIZE = int(os.getenv("BROWSE_CACHE_SIZE", "128"))
+BROWSE_CACHE_TTL = float(os.getenv("BROWSE_CACHE_TTL", "300"))
+_browse_cache = OrderedDict()
+_browse_lock = threading.Lock()
 
 class SearchRequest(BaseModel):
     query: str
     category: Optional[str] = None
     limit: Optional[int] = 10
 
+def _group_by_category(results: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Organize results into {category: [results]}"""
+    categories = defaultdict(list)
+    for result in results:
+        categories[result.get('category', 'General Tech')].append(result)
+    return dict(categories)
+
 # Mount static files
 frontend_dir = os.path.join(os.path.dirname(__file__), "..", "frontend")
+index_html_path = os.path.join(frontend_dir, "index.html")
 app.mount("/static", StaticFiles(directory=frontend_dir), name="static")
 
 @app.get("/")
 def read_root():
     """Serve the frontend HTML"""
-    html_path = os.path.join(os.path.dirname(__file__), "..", "frontend", "index.html")
-    return FileResponse(html_path)
+    return FileResponse(index_html_path)
 
 @app.get("/api/live_problems")
+@limiter.limit(SEARCH_RATE_LIMIT, exempt_when=_is_browse)
+@limiter.limit(BROWSE_RATE_LIMIT, exempt_when=_is_search)
 def get_live_problems(
+    request: Request,
     query: Optional[str] = Query(None, description="Search query for semantic search"),
     category: Optional[str] = Query(None, description="Filter by category"),
-    limit: Optional[int] = Query(20, description="Number of results to return"),
+    limit: Optional[int] = Query(20, ge=1, description="Number of results to return"),
+    offset: Optional[int] = Query(0, ge=0, description="Number of results to skip when browsing"),
     tech_only: Optional[bool] = Query(True, description="Show only tech-related subreddits")
 ):
     """Get tech problems using RAG semantic search"""
@@ -56,26 +127,12 @@ def get_live_problems(
             results = vector_store.search_similar(
                 query=query,
                 n_results=limit,
-                category_filter=category
+                category_filter=category,
+                tech_only=tech_only
             )
             
-            # Apply tech filter if requested
-            if tech_only:
-                tech_subreddits = {
-                    'learnprogramming', 'webdev', 'sysadmin', 'techsupport', 'softwaregore',
-                    'uxdesign', 'userexperience', 'saas', 'sideproject', 'startups', 
-                    'indianstartups', 'entrepreneur', 'notion', 'obsidianmd', 'trello',
-                    'futurology', 'productivity'
-                }
-                results = [r for r in results if r.get('subreddit', '').lower() in tech_subreddits]
-            
             # Organize by category
-            categories = {}
-            for result in results:
-                cat = result.get('category', 'General Tech')
-                if cat not in categories:
-                    categories[cat] = []
-                categories[cat].append(result)
+            categories = _group_by_category(results)
             
             return {
                 "status": "success",
@@ -88,27 +145,26 @@ def get_live_problems(
             }
         else:
             # Get all documents or browse by category
-            print(f"📦 Getting all problems (category: {category}, limit: {limit}, tech_only: {tech_only})")
+            print(f"📦 Getting all problems (category: {category}, limit: {limit}, offset: {offset}, tech_only: {tech_only})")
             
-            # Get all documents from vector store
+            # The document count acts as the version: new data means a new key
+            cache_key = (category, limit, offset, tech_only, vector_store.count())
+            with _browse_lock:
+                cached = _browse_cache.get(cache_key)
+                if cached is not None and time.monotonic() - cached[0] < BROWSE_CACHE_TTL:
+                    _browse_cache.move_to_end(cache_key)
+                    return cached[1]
+            
+            # Fetch exactly one page from the vector store
             all_results = vector_store.get_all_documents(
-                limit=limit if limit <= 100 else 1000,  # Safety limit
+                limit=min(limit, 1000),  # Safety limit
+                offset=offset,
                 category_filter=category,
                 tech_only=tech_only
             )
             
-            # If no specific limit, show more results
-            if limit == 20:  # Default limit
-                limit = min(100, len(all_results))  # Show up to 100 by default
-                all_results = all_results[:limit]
-            
             # Organize by category
-            categories = {}
-            for result in all_results:
-                cat = result.get('category', 'General Tech')
-                if cat not in categories:
-                    categories[cat] = []
-                categories[cat].append(result)
+            categories = _group_by_category(all_results)
             
             total_found = len(all_results)
             message = f"Showing {total_found} problems"
@@ -117,7 +173,7 @@ def get_live_problems(
             if tech_only:
                 message += " (tech subreddits only)"
             
-            return {
+            data = {
                 "status": "success",
                 "data": categories,
                 "total_found": total_found,
@@ -126,25 +182,57 @@ def get_live_problems(
                 "tech_only": tech_only
             }
             
+            with _browse_lock:
+                _browse_cache[cache_key] = (time.monotonic(), data)
+                _browse_cache.move_to_end(cache_key)
+                while len(_browse_cache) > BROWSE_CACHE_SIZE:
+                    _browse_cache.popitem(last=False)
+            
+            return data
+            
     except Exception as e:
         print(f"❌ API Error: {e}")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
+@app.get("/api/live_problems/stream")
+@limiter.limit(BROWSE_RATE_LIMIT)
+def stream_live_problems(
+    request: Request,
+    category: Optional[str] = Query(None, description="Filter by category"),
+    limit: Optional[int] = Query(None, description="Maximum number of results (default: all)"),
+    tech_only: Optional[bool] = Query(True, description="Show only tech-related subreddits")
+):
+    """Stream problems as NDJSON (one JSON document per line) for large exports"""
+    print(f"📤 Streaming problems (category: {category}, limit: {limit}, tech_only: {tech_only})")
+    # Pages are pulled from ChromaDB as the client reads, not all up front
+    documents = vector_store.iter_documents(
+        limit=limit,
+        category_filter=category,
+        tech_only=tech_only
+    )
+    
+    def generate():
+        for doc in documents:
+            yield orjson.dumps(doc) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @app.post("/api/search")
-def search_problems(request: SearchRequest):
+@limiter.limit(SEARCH_RATE_LIMIT)
+def search_problems(request: Request, search_request: SearchRequest):
     """Dedicated search endpoint for complex queries"""
     try:
-        print(f"� Advanced Search: '{request.query}' (category: {request.category})")
+        print(f"� Advanced Search: '{search_request.query}' (category: {search_request.category})")
         
         results = vector_store.search_similar(
-            query=request.query,
-            n_results=request.limit,
-            category_filter=request.category
+            query=search_request.query,
+            n_results=search_request.limit,
+            category_filter=search_request.category
         )
         
         return {
             "status": "success",
-            "query": request.query,
+            "query": search_request.query,
             "results": results,
             "total_found": len(results),
             "search_type": "advanced_semantic"
@@ -168,21 +256,40 @@ def get_categories():
         raise HTTPException(status_code=500, detail=f"Categories error: {str(e)}")
 
 @app.get("/api/status")
-def get_status():
+def get_status(request: Request, response: Response):
     """Get RAG system status"""
     try:
-        stats = vector_store.get_stats()
+        # Holding the lock while recomputing makes concurrent pollers share one refresh
+        with _status_lock:
+            if _status_cache["data"] is None or time.monotonic() - _status_cache["ts"] >= STATUS_CACHE_TTL:
+                stats = vector_store.get_stats()
+                
+                data = {
+                    "status": "running",
+                    "system_type": "RAG (Retrieval-Augmented Generation)",
+                    "vector_store": "ChromaDB",
+                    "embedding_model": stats.get("embedding_model", "unknown"),
+                    "total_documents": stats.get("total_documents", 0),
+                    "categories": stats.get("categories", []),
+                    "collection_name": stats.get("collection_name", "unknown"),
+                    "last_updated": datetime.now().isoformat()
+                }
+                
+                # ETag ignores last_updated so it only changes when the store does
+                fingerprint = {k: v for k, v in data.items() if k != "last_updated"}
+                _status_cache["etag"] = '"' + hashlib.md5(orjson.dumps(fingerprint)).hexdigest() + '"'
+                _status_cache["data"] = data
+                _status_cache["ts"] = time.monotonic()
+            
+            data = _status_cache["data"]
+            etag = _status_cache["etag"]
         
-        return {
-            "status": "running",
-            "system_type": "RAG (Retrieval-Augmented Generation)",
-            "vector_store": "ChromaDB",
-            "embedding_model": stats.get("embedding_model", "unknown"),
-            "total_documents": stats.get("total_documents", 0),
-            "categories": stats.get("categories", []),
-            "collection_name": stats.get("collection_name", "unknown"),
-            "last_updated": datetime.now().isoformat()
-        }
+        headers = {"ETag": etag, "Cache-Control": f"max-age={int(STATUS_CACHE_TTL)}"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        
+        response.headers.update(headers)
+        return data
         
     except Exception as e:
         print(f"❌ Status Error: {e}")
@@ -205,17 +312,6 @@ def get_similar_problems(problem_id: str, limit: int = 5):
 if __name__ == "__main__":
     import uvicorn
     
-    # Check if vector store has data
-    stats = vector_store.get_stats()
-    total_docs = stats.get("total_documents", 0)
-    
-    if total_docs == 0:
-        print("⚠️  WARNING: Vector store is empty!")
-        print("💡 Run preprocessing first: python preprocess_rag.py")
-        print("🔄 Starting server anyway (will return empty results)")
-    else:
-        print(f"✅ Vector store ready with {total_docs} documents")
-    
     print("🚀 Starting RAG Reddit Tech Problems Server on http://localhost:8004")
     print("📝 Frontend: http://localhost:8004")
     print("🔗 API: http://localhost:8004/api/live_problems")
@@ -101,6 +101,9 @@ HELP_SUBREDDITS = [
     "Students"
 ]
 
+# Lowercased lookup set for validate_subreddit_name
+_PAINPOINT_SUBREDDITS_LOWER = frozenset(s.lower() for s in PAINPOINT_SUBREDDITS)
+
 def get_subreddits_by_category(category: str = "all") -> list:
     """
     Get subreddit list by category
@@ -136,7 +139,7 @@ def validate_subreddit_name(name: str) -> bool:
         True if valid, False otherwise
     """
     clean_name = name.replace("r/", "").lower()
-    return clean_name in [s.lower() for s in PAINPOINT_SUBREDDITS]
+    return clean_name in _PAINPOINT_SUBREDDITS_LOWER
 
 def format_subreddit_url(name: str) -> str:
     """
@@ -1,26 +1,122 @@
 # nlp_processor.py
 import re
+import threading
+from typing import List
 from transformers import pipeline
 
-# Load the model once (at startup, not inside the loop)
-generator = pipeline(
-    "text2text-generation",
-    model="google/flan-t5-base"  # or flan-t5-large if GPU is ok
-)
+# Flan-T5 is loaded once, on first use, and shared by the module functions
+# and NLPProcessor, so importing this module stays cheap
+_generator = None
+_generator_loaded = False
+_generator_lock = threading.Lock()
+
+
+def _get_generator():
+    """Return the shared Flan-T5 pipeline, or None if it failed to load"""
+    global _generator, _generator_loaded
+    if not _generator_loaded:
+        with _generator_lock:
+            if not _generator_loaded:
+                try:
+                    _generator = pipeline(
+                        "text2text-generation",
+                        model="google/flan-t5-base"  # or flan-t5-large if GPU is ok
+                    )
+                except Exception as e:
+                    print(f"Flan-T5 failed to load: {e}")
+                _generator_loaded = True
+    return _generator
+
+# Prompts per forward pass in generate_problem_statements
+GENERATION_BATCH_SIZE = 8
+
+# Reddit/meta noise stripped by NLPProcessor.clean_text
+SUBREDDIT_REF_RE = re.compile(r"r/[A-Za-z0-9_]+")
+META_SYMBOL_RE = re.compile(r"•|👍|📝")
+URL_RE = re.compile(r"http\S+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Solution/tool mentions and emotional language stripped before problem extraction
+SOLUTION_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'I use this\s+[^.!?]*',
+    r'try this\s+[^.!?]*',
+    r'solution[^.!?]*',
+    r'fix[^.!?]*',
+    r'here\'s how[^.!?]*',
+    r'just use[^.!?]*',
+    r'simply[^.!?]*',
+    r'tool that[^.!?]*',
+    r'website that[^.!?]*',
+    r'app that[^.!?]*'
+))
+EMOTIONAL_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'WHY|DAMN|SO|HELP|PLEASE|STUPID|FRUSTRATED|DRIVING ME CRAZY',
+    r"I'VE BEEN|I'M ABOUT TO|REALLY NEED|PLEASE HELP",
+    r'anyone else|does anyone|help me',
+    r'[!]{2,}'
+))
+
+# Prefixes the model sometimes echoes back in its output
+ANALYSIS_PREFIX_RE = re.compile(r"^(Technical Analysis|Analysis|Problem|Issue):\s*", re.IGNORECASE)
+TECHNICAL_ISSUE_PREFIX_RE = re.compile(r"^Technical Issue:\s*", re.IGNORECASE)
+PROMPT_ECHO_RE = re.compile(r'^(Output|Input|Convert):\s*', re.IGNORECASE)
+
+# Technology/problem vocabulary for NLPProcessor._enhanced_rule_based_transform
+TECH_PATTERNS = {
+    'web_frameworks': re.compile(r'\b(react|angular|vue|django|flask|express|laravel|rails)\b'),
+    'databases': re.compile(r'\b(mysql|postgresql|mongodb|redis|sqlite|oracle|sql server)\b'),
+    'languages': re.compile(r'\b(python|javascript|java|c\+\+|c#|php|ruby|go|rust|typescript)\b'),
+    'platforms': re.compile(r'\b(aws|azure|gcp|docker|kubernetes|heroku|netlify|vercel)\b'),
+    'tools': re.compile(r'\b(git|npm|pip|webpack|gradle|maven|composer|yarn)\b'),
+    'errors': re.compile(r'\b(error|exception|crash|timeout|failed|broken|bug|issue)\b'),
+    'actions': re.compile(r'\b(install|deploy|build|compile|run|start|stop|configure|setup)\b')
+}
+QUOTED_ERROR_RE = re.compile(r'"([^"]*error[^"]*)"', re.IGNORECASE)
+FAILURE_WORD_RE = re.compile(r'(fails?|crashes?|timeouts?|broken|not working)')
+
+# Project/subject name patterns for _extract_key_subject, most specific first
+SUBJECT_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(\w+\.page)',  # domain names like inspo.page
+    r'(\w+\.com)',   # .com domains
+    r'(\w+\.io)',    # .io domains
+    r'my (\w+) (?:app|project|website|tool)',  # "my X app/project"
+    r'(\w+) (?:app|application)',  # "X app"
+    r'(\w+) (?:project|tool|library)',  # "X project"
+))
+NON_WORD_RE = re.compile(r'[^\w]')
+
+# Words that are never a project name in _extract_key_subject
+SUBJECT_STOP_WORDS = frozenset({'the', 'my', 'this', 'that', 'web', 'mobile'})
+CAPITALIZED_STOP_WORDS = frozenset({'the', 'my', 'this', 'that', 'help', 'need', 'having', 'getting'})
+
+# Error, hardware and platform details for _extract_enhanced_context
+ERROR_DETAIL_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'error\s*:\s*([^.!?\n]+)',
+    r'exception\s*:\s*([^.!?\n]+)',
+    r'failed\s+to\s+([^.!?\n]+)',
+    r'cannot\s+([^.!?\n]+)',
+    r"can't\s+([^.!?\n]+)"
+))
+HARDWARE_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(\d+)\s*gb\s*ram',
+    r'intel\s+core\s+(i[3-9]-?\d+\w*)',
+    r'(gtx|rtx)\s*(\d+)',
+    r'(\d+)\s*core\s*cpu'
+))
+PLATFORM_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(windows|mac|linux|ubuntu|centos|fedora)\s*(\d+(?:\.\d+)*)?',
+    r'(android|ios)\s*(\d+(?:\.\d+)*)?'
+))
 
 class NLPProcessor:
     def __init__(self):
         self.model = None
         self.fallback_model = None
 
-        try:
-            print("Loading Flan-T5...")
-            self.model = pipeline(
-                "text2text-generation",
-                model="google/flan-t5-base"
-            )
-        except Exception as e:
-            print("Flan-T5 failed, trying BART:", e)
+        print("Loading Flan-T5...")
+        self.model = _get_generator()
+        if self.model is None:
+            print("Flan-T5 failed, trying BART")
             try:
                 self.fallback_model = pipeline(
                     "summarization",
@@ -32,10 +128,10 @@ class NLPProcessor:
 
     def clean_text(self, text: str) -> str:
         """Remove Reddit/meta noise from text"""
-        text = re.sub(r"r/[A-Za-z0-9_]+", "", text)      # remove subreddit refs
-        text = re.sub(r"•|👍|📝", "", text)              # remove bullets/emojis
-        text = re.sub(r"http\S+", "", text)               # remove URLs
-        text = re.sub(r"\s+", " ", text).strip()          # normalize spaces
+        text = SUBREDDIT_REF_RE.sub("", text)      # remove subreddit refs
+        text = META_SYMBOL_RE.sub("", text)        # remove bullets/emojis
+        text = URL_RE.sub("", text)                # remove URLs
+        text = WHITESPACE_RE.sub(" ", text).strip()  # normalize spaces
         return text
 
     def flan_prompt(self, text: str) -> str:
@@ -67,8 +163,8 @@ class NLPProcessor:
                 output = result[0]["generated_text"].strip()
 
                 # Post-process: Clean up the output and ensure it's technical
-                output = re.sub(r"^(Technical Analysis|Analysis|Problem|Issue):\s*", "", output, flags=re.IGNORECASE)
-                output = re.sub(r"^Technical Issue:\s*", "", output, flags=re.IGNORECASE)
+                output = ANALYSIS_PREFIX_RE.sub("", output)
+                output = TECHNICAL_ISSUE_PREFIX_RE.sub("", output)
                 
                 # If we got a good technical response, use it
                 if len(output) > 20 and any(tech_word in output.lower() for tech_word in 
@@ -92,27 +188,14 @@ class NLPProcessor:
     def _enhanced_rule_based_transform(self, text: str) -> str:
         """Enhanced rule-based transformation with technical specificity"""
         
-        # Extract technical keywords and context
-        tech_patterns = {
-            'web_frameworks': r'\b(react|angular|vue|django|flask|express|laravel|rails)\b',
-            'databases': r'\b(mysql|postgresql|mongodb|redis|sqlite|oracle|sql server)\b',
-            'languages': r'\b(python|javascript|java|c\+\+|c#|php|ruby|go|rust|typescript)\b',
-            'platforms': r'\b(aws|azure|gcp|docker|kubernetes|heroku|netlify|vercel)\b',
-            'tools': r'\b(git|npm|pip|webpack|gradle|maven|composer|yarn)\b',
-            'errors': r'\b(error|exception|crash|timeout|failed|broken|bug|issue)\b',
-            'actions': r'\b(install|deploy|build|compile|run|start|stop|configure|setup)\b'
-        }
+        text_lower = text.lower()
         
+        # Extract technical keywords and context (only the first hit per category is used)
         found_tech = {}
-        for category, pattern in tech_patterns.items():
-            matches = re.findall(pattern, text.lower())
-            if matches:
-                found_tech[category] = matches
-        
-        # Extract specific error messages or symptoms
-        error_indicators = re.findall(r'"([^"]*error[^"]*)"', text, re.IGNORECASE)
-        if not error_indicators:
-            error_indicators = re.findall(r'(fails?|crashes?|timeouts?|broken|not working)', text.lower())
+        for category, pattern in TECH_PATTERNS.items():
+            match = pattern.search(text_lower)
+            if match:
+                found_tech[category] = match.group(1)
         
         # Build specific technical statement
         if found_tech:
@@ -120,40 +203,47 @@ class NLPProcessor:
             
             # Add technology context
             if 'languages' in found_tech:
-                statement_parts.append(f"{found_tech['languages'][0].title()} application")
+                statement_parts.append(f"{found_tech['languages'].title()} application")
             elif 'web_frameworks' in found_tech:
-                statement_parts.append(f"{found_tech['web_frameworks'][0].title()} application")
+                statement_parts.append(f"{found_tech['web_frameworks'].title()} application")
+            
+            # Extract specific error messages or symptoms
+            error_indicator = None
+            if 'errors' in found_tech:
+                error_match = QUOTED_ERROR_RE.search(text) or FAILURE_WORD_RE.search(text_lower)
+                if error_match:
+                    error_indicator = error_match.group(1)
             
             # Add specific problem
-            if 'errors' in found_tech and error_indicators:
-                statement_parts.append(f"experiencing {error_indicators[0]}")
+            if error_indicator:
+                statement_parts.append(f"experiencing {error_indicator}")
             elif 'actions' in found_tech:
-                statement_parts.append(f"failing during {found_tech['actions'][0]} process")
+                statement_parts.append(f"failing during {found_tech['actions']} process")
             
             # Add technical context
             if 'databases' in found_tech:
-                statement_parts.append(f"with {found_tech['databases'][0].upper()} database")
+                statement_parts.append(f"with {found_tech['databases'].upper()} database")
             elif 'platforms' in found_tech:
-                statement_parts.append(f"on {found_tech['platforms'][0].upper()} platform")
+                statement_parts.append(f"on {found_tech['platforms'].upper()} platform")
             elif 'tools' in found_tech:
-                statement_parts.append(f"using {found_tech['tools'][0]} tool")
+                statement_parts.append(f"using {found_tech['tools']} tool")
             
             if statement_parts:
                 return " ".join(statement_parts) + " requiring technical investigation"
         
         # Fallback: Try to extract the core technical issue
         # Look for specific patterns
-        if 'install' in text.lower():
+        if 'install' in text_lower:
             return "Installation/dependency configuration issue requiring environment setup fix"
-        elif any(word in text.lower() for word in ['build', 'compile']):
+        elif any(word in text_lower for word in ['build', 'compile']):
             return "Build/compilation process failure requiring code or configuration fix"
-        elif any(word in text.lower() for word in ['deploy', 'production']):
+        elif any(word in text_lower for word in ['deploy', 'production']):
             return "Deployment/production environment issue requiring infrastructure fix"
-        elif any(word in text.lower() for word in ['connection', 'network', 'timeout']):
+        elif any(word in text_lower for word in ['connection', 'network', 'timeout']):
             return "Network/connection timeout issue requiring connectivity troubleshooting"
-        elif any(word in text.lower() for word in ['performance', 'slow', 'speed']):
+        elif any(word in text_lower for word in ['performance', 'slow', 'speed']):
             return "Performance optimization issue requiring code/infrastructure tuning"
-        elif any(word in text.lower() for word in ['auth', 'login', 'permission']):
+        elif any(word in text_lower for word in ['auth', 'login', 'permission']):
             return "Authentication/authorization issue requiring security configuration fix"
         else:
             # Extract first technical sentence if possible
@@ -188,7 +278,7 @@ def generate_problem_statement(text: str) -> str:
     clean_text = _clean_for_problem_extraction(text)
     
     # Try AI-powered problem statement generation first
-    if hasattr(generator, '__call__'):
+    if _get_generator() is not None:
         try:
             problem_statement = _ai_generate_problem_statement(clean_text)
             if _validate_problem_statement(problem_statement):
@@ -200,47 +290,61 @@ def generate_problem_statement(text: str) -> str:
     return _rule_based_problem_statement(clean_text)
 
 
+def generate_problem_statements(texts: List[str]) -> List[str]:
+    """
+    Batched version of generate_problem_statement.
+    
+    All prompts go through the model in one pipeline call (GENERATION_BATCH_SIZE
+    at a time); each output is validated on its own and falls back to the
+    rule-based statement if it doesn't pass.
+    """
+    clean_texts = [_clean_for_problem_extraction(text) for text in texts]
+    statements = [None] * len(clean_texts)
+    
+    generator = _get_generator() if clean_texts else None
+    if generator is not None:
+        try:
+            outputs = generator(
+                [_build_problem_prompt(clean) for clean in clean_texts],
+                max_new_tokens=60, do_sample=True, temperature=0.3,
+                batch_size=GENERATION_BATCH_SIZE
+            )
+            for i, output in enumerate(outputs):
+                # The pipeline nests results in a list per input on some versions
+                if isinstance(output, list):
+                    output = output[0]
+                statement = _parse_generated_statement(output["generated_text"])
+                if _validate_problem_statement(statement):
+                    statements[i] = statement
+        except Exception as e:
+            print(f"AI batch problem statement generation failed: {e}")
+    
+    return [
+        statement if statement is not None else _rule_based_problem_statement(clean)
+        for statement, clean in zip(statements, clean_texts)
+    ]
+
+
 def _clean_for_problem_extraction(text: str) -> str:
     """Clean text specifically for problem statement extraction"""
     
     # Remove solution indicators and tool mentions
-    solution_patterns = [
-        r'I use this\s+[^.!?]*',
-        r'try this\s+[^.!?]*',
-        r'solution[^.!?]*',
-        r'fix[^.!?]*',
-        r'here\'s how[^.!?]*',
-        r'just use[^.!?]*',
-        r'simply[^.!?]*',
-        r'tool that[^.!?]*',
-        r'website that[^.!?]*',
-        r'app that[^.!?]*'
-    ]
-    
-    for pattern in solution_patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    for pattern in SOLUTION_PATTERNS:
+        text = pattern.sub('', text)
     
     # Remove emotional expressions and help requests
-    emotional_patterns = [
-        r'WHY|DAMN|SO|HELP|PLEASE|STUPID|FRUSTRATED|DRIVING ME CRAZY',
-        r"I'VE BEEN|I'M ABOUT TO|REALLY NEED|PLEASE HELP",
-        r'anyone else|does anyone|help me',
-        r'[!]{2,}'
-    ]
-    
-    for pattern in emotional_patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    for pattern in EMOTIONAL_PATTERNS:
+        text = pattern.sub('', text)
     
     # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = WHITESPACE_RE.sub(' ', text).strip()
     
     return text
 
 
-def _ai_generate_problem_statement(clean_text: str) -> str:
-    """Use AI to generate a user-focused problem statement"""
-    
-    prompt = (
+def _build_problem_prompt(clean_text: str) -> str:
+    """Few-shot prompt asking the model for a user-focused problem statement"""
+    return (
         "Convert this text into a clear problem statement. Follow these rules:\n"
         "1. Start with 'Users' or 'People'\n"
         "2. Focus on the underlying struggle or pain point\n"
@@ -255,8 +359,10 @@ def _ai_generate_problem_statement(clean_text: str) -> str:
         f"Input: {clean_text}\n"
         "Output:"
     )
-    
-    result = generator(prompt, max_new_tokens=60, do_sample=True, temperature=0.3)[0]["generated_text"]
+
+
+def _parse_generated_statement(result: str) -> str:
+    """Pull the problem statement out of raw model output"""
     
     # Extract the generated statement
     if "Output:" in result:
@@ -273,12 +379,18 @@ def _ai_generate_problem_statement(clean_text: str) -> str:
             statement = result.strip()
     
     # Clean up artifacts
-    statement = re.sub(r'^(Output|Input|Convert):\s*', '', statement, flags=re.IGNORECASE)
+    statement = PROMPT_ECHO_RE.sub('', statement)
     statement = statement.strip()
     
     return statement
 
 
+def _ai_generate_problem_statement(clean_text: str) -> str:
+    """Use AI to generate a user-focused problem statement"""
+    result = _get_generator()(_build_problem_prompt(clean_text), max_new_tokens=60, do_sample=True, temperature=0.3)[0]["generated_text"]
+    return _parse_generated_statement(result)
+
+
 def _rule_based_problem_statement(text: str) -> str:
     """Generate a rule-based problem statement"""
     
@@ -590,33 +702,23 @@ def _extract_technical_field(text: str) -> str:
 
 def _extract_key_subject(text: str) -> str:
     """Extract the key subject/project name from text"""
-    import re
     
     # Look for specific patterns first
-    patterns = [
-        r'(\w+\.page)',  # domain names like inspo.page
-        r'(\w+\.com)',   # .com domains
-        r'(\w+\.io)',    # .io domains
-        r'my (\w+) (?:app|project|website|tool)',  # "my X app/project"
-        r'(\w+) (?:app|application)',  # "X app"
-        r'(\w+) (?:project|tool|library)',  # "X project"
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in SUBJECT_PATTERNS:
+        matches = pattern.findall(text)
         if matches:
             subject = matches[0].lower()
             # Filter out common words
-            if subject not in ['the', 'my', 'this', 'that', 'web', 'mobile']:
+            if subject not in SUBJECT_STOP_WORDS:
                 return subject
     
     # Look for capitalized words that might be project names
     words = text.split()
     for word in words[:10]:  # Check first 10 words
-        clean_word = re.sub(r'[^\w]', '', word)
+        clean_word = NON_WORD_RE.sub('', word)
         if (clean_word and len(clean_word) > 2 and 
             clean_word[0].isupper() and 
-            clean_word.lower() not in ['the', 'my', 'this', 'that', 'help', 'need', 'having', 'getting']):
+            clean_word.lower() not in CAPITALIZED_STOP_WORDS):
             return clean_word.lower()
     
     return ""
@@ -650,36 +752,19 @@ def _extract_enhanced_context(text: str) -> dict:
                 context['technologies'].append(tech)
     
     # Error extraction
-    error_patterns = [
-        r'error\s*:\s*([^.!?\n]+)',
-        r'exception\s*:\s*([^.!?\n]+)',
-        r'failed\s+to\s+([^.!?\n]+)',
-        r'cannot\s+([^.!?\n]+)',
-        r"can't\s+([^.!?\n]+)"
-    ]
-    for pattern in error_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in ERROR_DETAIL_PATTERNS:
+        matches = pattern.findall(text)
         context['errors'].extend(matches[:2])
     
     # Hardware extraction
-    hardware_patterns = [
-        r'(\d+)\s*gb\s*ram',
-        r'intel\s+core\s+(i[3-9]-?\d+\w*)',
-        r'(gtx|rtx)\s*(\d+)',
-        r'(\d+)\s*core\s*cpu'
-    ]
-    for pattern in hardware_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in HARDWARE_PATTERNS:
+        matches = pattern.findall(text)
         if matches:
             context['hardware'].extend([' '.join(match) if isinstance(match, tuple) else match for match in matches])
     
     # Platform extraction
-    platform_patterns = [
-        r'(windows|mac|linux|ubuntu|centos|fedora)\s*(\d+(?:\.\d+)*)?',
-        r'(android|ios)\s*(\d+(?:\.\d+)*)?'
-    ]
-    for pattern in platform_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in PLATFORM_PATTERNS:
+        matches = pattern.findall(text)
         if matches:
             context['platforms'].extend([' '.join(match).strip() if isinstance(match, tuple) else match for match in matches])
     
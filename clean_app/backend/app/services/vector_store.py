@@ -7,24 +7,63 @@ Handles embeddings and semantic search using ChromaDB
 import os
 import sys
 import json
+import time
+import threading
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 import uuid
+from functools import lru_cache
 from datetime import datetime
 
+# Tech-related subreddits, spelled as they are stored in the "subreddit" metadata
+TECH_SUBREDDITS = [
+    'learnprogramming', 'webdev', 'sysadmin', 'techsupport', 'softwaregore',
+    'UXDesign', 'userexperience', 'SaaS', 'SideProject', 'startups',
+    'indianstartups', 'Entrepreneur', 'Notion', 'ObsidianMD', 'Trello',
+    'Futurology', 'productivity'
+]
+
+# Resolved once at import so every store opens the same persistent directory
+VECTOR_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../vector_db"))
+
+# How long the category list is reused before rescanning metadata (seconds)
+CATEGORIES_CACHE_TTL = float(os.getenv("CATEGORIES_CACHE_TTL", "60"))
+
+# Documents embedded and written per collection.upsert() call
+ADD_BATCH_SIZE = int(os.getenv("ADD_BATCH_SIZE", "500"))
+
+# Number of distinct search queries whose embeddings are kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+# New collections use a cosine HNSW index so 1 - distance is a real similarity
+COLLECTION_METADATA = {
+    "description": "Reddit tech problems with AI summaries",
+    "hnsw:space": "cosine"
+}
+
+# ChromaDB "$in" matches are case-sensitive, so accept both spellings
+TECH_SUBREDDIT_VALUES = sorted({name for sub in TECH_SUBREDDITS for name in (sub, sub.lower())})
+
 class VectorStore:
     """ChromaDB vector store for semantic search"""
     
     def __init__(self, collection_name: str = "reddit_tech_problems"):
         self.collection_name = collection_name
         
+        # Short-lived cache for get_all_categories (polled by /api/categories and /api/status)
+        self._categories_cache = None
+        self._categories_cached_at = 0.0
+        self._categories_lock = threading.Lock()
+        
+        # Repeated searches (suggested queries, pagination) reuse the query embedding
+        self._embed_query = lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._encode_query)
+        
         # Initialize ChromaDB with persistent storage
         # Use absolute path to ensure consistency across different working directories
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../vector_db"))
         self.client = chromadb.PersistentClient(
-            path=db_path,
+            path=VECTOR_DB_PATH,
             settings=Settings(
                 anonymized_telemetry=False,
                 allow_reset=True
@@ -33,9 +72,9 @@ class VectorStore:
         
         # Initialize embedding model
         print("🔄 Loading embedding model...")
-        model_name = os.getenv("HUGGINGFACE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-        self.embedding_model = SentenceTransformer(model_name)
-        print(f"✅ Loaded embedding model: {model_name}")
+        self.model_name = os.getenv("HUGGINGFACE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.embedding_model = SentenceTransformer(self.model_name)
+        print(f"✅ Loaded embedding model: {self.model_name}")
         
         # Get or create collection
         try:
@@ -44,7 +83,7 @@ class VectorStore:
         except:
             self.collection = self.client.create_collection(
                 name=collection_name,
-                metadata={"description": "Reddit tech problems with AI summaries"}
+                metadata=COLLECTION_METADATA
             )
             print(f"🆕 Created new collection: {collection_name}")
     
@@ -57,6 +96,33 @@ class VectorStore:
             print(f"❌ Embedding error: {e}")
             return [[0.0] * 384] * len(texts)  # Fallback empty embeddings
     
+    def _encode_query(self, query: str) -> tuple:
+        """Embed a single search query; errors propagate so they are never cached"""
+        return tuple(self.embedding_model.encode([query], convert_to_tensor=False)[0].tolist())
+    
+    def warm_up(self):
+        """Run one throwaway encode and count so the first real request doesn't pay for it"""
+        try:
+            self.generate_embeddings(["warm up"])
+            self.count()
+            print("🔥 Embedding model and collection warmed up")
+        except Exception as e:
+            print(f"⚠️ Warm-up failed: {e}")
+    
+    def _build_where(self, category_filter: Optional[str] = None, tech_only: bool = False) -> Optional[Dict[str, Any]]:
+        """Build a ChromaDB where clause so filtering happens inside the query"""
+        conditions = []
+        if category_filter and category_filter != "All":
+            conditions.append({"category": category_filter})
+        if tech_only:
+            conditions.append({"subreddit": {"$in": TECH_SUBREDDIT_VALUES}})
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+    
     def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """Add documents to vector store"""
         try:
@@ -72,9 +138,16 @@ class VectorStore:
             metadatas = []
             documents_texts = []
             
+            # Default timestamp for documents that don't carry their own
+            processed_at = datetime.now().isoformat()
+            
+            seen_ids = set()
             for doc in documents:
-                # Create unique ID
-                doc_id = str(uuid.uuid4())
+                # Reddit posts keep their post id so re-runs update instead of duplicating
+                doc_id = doc.get('reddit_id') or str(uuid.uuid4())
+                if doc_id in seen_ids:
+                    continue
+                seen_ids.add(doc_id)
                 ids.append(doc_id)
                 
                 # Text for embedding (title + AI summary + description)
@@ -92,67 +165,78 @@ class VectorStore:
                     "url": doc.get('url', ''),
                     "score": doc.get('score', 0),
                     "created_utc": doc.get('created_utc', 0),
-                    "processed_at": doc.get('processed_at', datetime.now().isoformat()),
+                    "processed_at": doc.get('processed_at', processed_at),
                     "description": doc.get('description', '')[:500]  # Truncate for storage
                 }
                 metadatas.append(metadata)
             
-            # Generate embeddings
-            print("🤖 Generating embeddings...")
-            embeddings = self.generate_embeddings(embeddings_texts)
+            # Embed and add in fixed-size batches to bound memory and stay
+            # under ChromaDB's per-call batch limit
+            for start in range(0, len(ids), ADD_BATCH_SIZE):
+                end = start + ADD_BATCH_SIZE
+                print(f"🤖 Generating embeddings ({start + 1}-{min(end, len(ids))} of {len(ids)})...")
+                embeddings = self.generate_embeddings(embeddings_texts[start:end])
+                
+                print("💾 Adding to vector store...")
+                self.collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=embeddings,
+                    metadatas=metadatas[start:end],
+                    documents=documents_texts[start:end]
+                )
             
-            # Add to ChromaDB
-            print("💾 Adding to vector store...")
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                documents=documents_texts
-            )
+            self.invalidate_categories()
             
-            print(f"✅ Added {len(documents)} documents to vector store")
+            print(f"✅ Added {len(ids)} documents to vector store")
             return True
             
         except Exception as e:
             print(f"❌ Error adding documents: {e}")
             return False
     
-    def search_similar(self, query: str, n_results: int = 10, category_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+    def existing_ids(self, ids: List[str]) -> set:
+        """Return the subset of ids that are already stored"""
+        if not ids:
+            return set()
+        try:
+            return set(self.collection.get(ids=list(ids), include=[])['ids'])
+        except Exception as e:
+            print(f"❌ Error checking existing ids: {e}")
+            return set()
+    
+    def search_similar(self, query: str, n_results: int = 10, category_filter: Optional[str] = None, tech_only: bool = False) -> List[Dict[str, Any]]:
         """Search for similar documents"""
         try:
-            # Generate query embedding
-            query_embedding = self.generate_embeddings([query])[0]
-            
-            # Prepare where clause for filtering
-            where_clause = {}
-            if category_filter and category_filter != "All":
-                where_clause["category"] = category_filter
+            # Generate query embedding (cached per query string)
+            query_embedding = list(self._embed_query(query))
             
-            # Search
+            # Search with category/tech filters applied by ChromaDB
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=n_results,
-                where=where_clause if where_clause else None,
+                where=self._build_where(category_filter, tech_only),
                 include=["metadatas", "documents", "distances"]
             )
             
-            # Format results
+            # Format results (ChromaDB returns one column per field for each query)
             formatted_results = []
-            if results['ids'] and len(results['ids'][0]) > 0:
-                for i in range(len(results['ids'][0])):
-                    result = {
-                        "id": results['ids'][0][i],
-                        "title": results['metadatas'][0][i]['title'],
-                        "ai_problem_statement": results['documents'][0][i],
-                        "description": results['metadatas'][0][i]['description'],
-                        "category": results['metadatas'][0][i]['category'],
-                        "subreddit": results['metadatas'][0][i]['subreddit'],
-                        "url": results['metadatas'][0][i]['url'],
-                        "score": results['metadatas'][0][i]['score'],
-                        "similarity_score": 1 - results['distances'][0][i],  # Convert distance to similarity
-                        "processed_at": results['metadatas'][0][i]['processed_at']
-                    }
-                    formatted_results.append(result)
+            if results['ids'] and results['ids'][0]:
+                for doc_id, metadata, document, distance in zip(
+                    results['ids'][0], results['metadatas'][0],
+                    results['documents'][0], results['distances'][0]
+                ):
+                    formatted_results.append({
+                        "id": doc_id,
+                        "title": metadata['title'],
+                        "ai_problem_statement": document,
+                        "description": metadata['description'],
+                        "category": metadata['category'],
+                        "subreddit": metadata['subreddit'],
+                        "url": metadata['url'],
+                        "score": metadata['score'],
+                        "similarity_score": 1 - distance,  # Convert distance to similarity
+                        "processed_at": metadata['processed_at']
+                    })
             
             print(f"🔍 Found {len(formatted_results)} similar documents for query: '{query[:50]}...'")
             return formatted_results
@@ -161,8 +245,18 @@ class VectorStore:
             print(f"❌ Search error: {e}")
             return []
     
+    def invalidate_categories(self):
+        """Drop the cached category list so the next read rescans the collection"""
+        with self._categories_lock:
+            self._categories_cache = None
+    
     def get_all_categories(self) -> List[str]:
-        """Get all available categories"""
+        """Get all available categories (cached for CATEGORIES_CACHE_TTL seconds)"""
+        with self._categories_lock:
+            if (self._categories_cache is not None and
+                    time.monotonic() - self._categories_cached_at < CATEGORIES_CACHE_TTL):
+                return list(self._categories_cache)
+        
         try:
             # Get a sample of documents to extract categories
             results = self.collection.get(
@@ -176,80 +270,51 @@ class VectorStore:
                     if 'category' in metadata:
                         categories.add(metadata['category'])
             
-            return sorted(list(categories))
+            sorted_categories = sorted(categories)
+            with self._categories_lock:
+                self._categories_cache = sorted_categories
+                self._categories_cached_at = time.monotonic()
+            
+            return list(sorted_categories)
             
         except Exception as e:
             print(f"❌ Error getting categories: {e}")
             return ["General Tech"]
     
-    def get_all_documents(self, limit: int = 1000, category_filter: Optional[str] = None, tech_only: bool = False) -> List[Dict[str, Any]]:
-        """Get all documents from the collection"""
+    def _format_documents(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Turn a ChromaDB get() result into API documents"""
+        documents = []
+        if results['metadatas'] and results['documents']:
+            for doc_id, metadata, document in zip(results['ids'], results['metadatas'], results['documents']):
+                documents.append({
+                    "id": doc_id,
+                    "title": metadata.get('title', 'Untitled'),
+                    "ai_problem_statement": document,
+                    "category": metadata.get('category', 'General Tech'),
+                    "subreddit": metadata.get('subreddit', ''),
+                    "url": metadata.get('url', ''),
+                    "score": metadata.get('score', 0),
+                    "description": metadata.get('description', ''),
+                    "created_utc": metadata.get('created_utc', 0),
+                    "processed_at": metadata.get('processed_at', ''),
+                    "similarity_score": 1.0  # All docs are 100% relevant when browsing all
+                })
+        return documents
+    
+    def get_all_documents(self, limit: Optional[int] = 1000, category_filter: Optional[str] = None, tech_only: bool = False, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get one page of documents from the collection"""
         try:
-            print(f"📦 Getting all documents (limit: {limit}, category: {category_filter}, tech_only: {tech_only})")
-            
-            # Tech-related subreddits list
-            tech_subreddits = {
-                'learnprogramming', 'webdev', 'sysadmin', 'techsupport', 'softwaregore',
-                'UXDesign', 'userexperience', 'SaaS', 'SideProject', 'startups', 
-                'indianstartups', 'Entrepreneur', 'Notion', 'ObsidianMD', 'trello',
-                'Futurology', 'productivity'
-            }
-            
-            # Get documents from ChromaDB
-            where_filter = {}
-            if category_filter and category_filter != "All":
-                where_filter["category"] = category_filter
+            print(f"📦 Getting all documents (limit: {limit}, offset: {offset}, category: {category_filter}, tech_only: {tech_only})")
             
-            if tech_only:
-                # Filter for tech subreddits
-                if where_filter:
-                    # Can't use complex AND/OR filters easily in ChromaDB, so we'll filter after retrieval
-                    results = self.collection.get(
-                        limit=limit,
-                        where=where_filter,
-                        include=["metadatas", "documents"]
-                    )
-                else:
-                    results = self.collection.get(
-                        limit=limit,
-                        include=["metadatas", "documents"]
-                    )
-            else:
-                if where_filter:
-                    results = self.collection.get(
-                        limit=limit,
-                        where=where_filter,
-                        include=["metadatas", "documents"]
-                    )
-                else:
-                    results = self.collection.get(
-                        limit=limit,
-                        include=["metadatas", "documents"]
-                    )
+            # Category and tech filters are pushed into the ChromaDB query
+            results = self.collection.get(
+                limit=limit,
+                offset=offset,
+                where=self._build_where(category_filter, tech_only),
+                include=["metadatas", "documents"]
+            )
             
-            documents = []
-            if results['metadatas'] and results['documents']:
-                for i, metadata in enumerate(results['metadatas']):
-                    subreddit = metadata.get('subreddit', '').lower()
-                    
-                    # Apply tech filter if requested
-                    if tech_only and subreddit not in tech_subreddits:
-                        continue
-                    
-                    doc = {
-                        "id": results['ids'][i] if 'ids' in results else f"doc_{i}",
-                        "title": metadata.get('title', 'Untitled'),
-                        "ai_problem_statement": results['documents'][i],
-                        "category": metadata.get('category', 'General Tech'),
-                        "subreddit": metadata.get('subreddit', ''),
-                        "url": metadata.get('url', ''),
-                        "score": metadata.get('score', 0),
-                        "description": metadata.get('description', ''),
-                        "created_utc": metadata.get('created_utc', 0),
-                        "processed_at": metadata.get('processed_at', ''),
-                        "similarity_score": 1.0  # All docs are 100% relevant when browsing all
-                    }
-                    documents.append(doc)
+            documents = self._format_documents(results)
             
             print(f"✅ Retrieved {len(documents)} documents" + (" (tech-filtered)" if tech_only else ""))
             return documents
@@ -257,17 +322,50 @@ class VectorStore:
         except Exception as e:
             print(f"❌ Error getting all documents: {e}")
             return []
+    
+    def iter_documents(self, batch_size: int = 500, limit: Optional[int] = None, category_filter: Optional[str] = None, tech_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield documents page by page so only one batch is held in memory"""
+        where = self._build_where(category_filter, tech_only)
+        offset = 0
+        
+        while limit is None or offset < limit:
+            page_size = batch_size if limit is None else min(batch_size, limit - offset)
+            try:
+                results = self.collection.get(
+                    limit=page_size,
+                    offset=offset,
+                    where=where,
+                    include=["metadatas", "documents"]
+                )
+            except Exception as e:
+                print(f"❌ Error iterating documents: {e}")
+                return
+            
+            batch = self._format_documents(results)
+            yield from batch
+            
+            if len(batch) < page_size:
+                return
+            offset += len(batch)
 
+    def count(self) -> int:
+        """Number of documents in the collection"""
+        try:
+            return self.collection.count()
+        except Exception as e:
+            print(f"❌ Error counting documents: {e}")
+            return 0
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get vector store statistics"""
         try:
-            count = self.collection.count()
+            count = self.count()
             categories = self.get_all_categories()
             
             return {
                 "total_documents": count,
                 "categories": categories,
-                "embedding_model": os.getenv("HUGGINGFACE_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+                "embedding_model": self.model_name,
                 "collection_name": self.collection_name
             }
             
@@ -281,8 +379,9 @@ class VectorStore:
             self.client.delete_collection(self.collection_name)
             self.collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"description": "Reddit tech problems with AI summaries"}
+                metadata=COLLECTION_METADATA
             )
+            self.invalidate_categories()
             print(f"🗑️ Cleared collection: {self.collection_name}")
             return True
         except Exception as e:
@@ -0,0 +1,7 @@
+import re
+from typing import Iterable
+
+
+def keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    """One compiled alternation that matches if any keyword is a substring"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
@@ -1,6 +1,6 @@
 import os
-import time
 import json
+from functools import lru_cache
 from typing import List, Dict
 
 import praw
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 from praw.models import Submission
 
 
+@lru_cache(maxsize=1)
 def _load_env() -> dict:
     # Load .env into environment for local dev if present
     load_dotenv(override=False)
@@ -31,7 +32,10 @@ def _load_env() -> dict:
     }
 
 
+@lru_cache(maxsize=1)
 def _init_reddit() -> praw.Reddit:
+    # One shared client per process: the connection check below runs once,
+    # and a failed init isn't cached so the next call retries
     creds = _load_env()
     # Reddit script application for read-only access
     reddit = praw.Reddit(
@@ -62,10 +66,10 @@ def _submission_to_dict(s: Submission) -> Dict:
     return {
         'id': s.id,
         'title': s.title or '',
-        'text': getattr(s, 'selftext', '') or '',
+        'text': s.selftext or '',
         'url': s.url,
-        'timestamp': int(getattr(s, 'created_utc', time.time())),
-        'subreddit': str(getattr(s, 'subreddit', '')),
+        'timestamp': int(s.created_utc),
+        'subreddit': s.subreddit.display_name,
     }
 
 
@@ -9,8 +9,9 @@ import os
 import sys
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # Add paths for imports
 current_dir = os.path.dirname(__file__)
@@ -19,19 +20,69 @@ sys.path.append(parent_dir)
 sys.path.append(os.path.join(parent_dir, "backend"))
 
 from backend.app.utils.reddit_search import _init_reddit
+from backend.app.utils.keywords import keyword_pattern
 from backend.app.config.subreddits import PAINPOINT_SUBREDDITS
-from backend.app.services.nlp_processor import generate_problem_statement
+from backend.app.services.nlp_processor import generate_problem_statements
 from backend.app.services.vector_store import VectorStore
 
+# Tech keywords (must have at least one)
+TECH_KEYWORDS_RE = keyword_pattern([
+    'python', 'javascript', 'java', 'c++', 'c#', 'react', 'angular', 'vue', 'node', 'php', 'html', 'css', 'sql',
+    'windows', 'linux', 'mac', 'android', 'ios', 'ubuntu', 'docker', 'kubernetes',
+    'git', 'vs code', 'postgresql', 'mysql', 'mongodb', 'api', 'aws', 'azure', 'github',
+    'error', 'crash', 'bug', 'fail', 'broken', 'timeout', 'exception',
+    'install', 'setup', 'configure', 'deploy', 'build', 'compile', 'debug', 'code', 'programming',
+    'software', 'hardware', 'computer', 'laptop', 'server', 'database', 'network', 'wifi'
+])
+
+# Exclude non-tech topics
+NON_TECH_RE = keyword_pattern([
+    'relationship', 'dating', 'girlfriend', 'boyfriend', 'marriage', 'divorce',
+    'politics', 'election', 'trump', 'biden', 'government', 'voting',
+    'religion', 'god', 'church', 'prayer', 'bible',
+    'sports', 'football', 'basketball', 'soccer', 'baseball',
+    'food', 'recipe', 'cooking', 'restaurant', 'eating',
+    'movie', 'netflix', 'tv show', 'celebrity', 'actor',
+    'weight loss', 'diet', 'fitness', 'workout', 'gym',
+    'medical', 'doctor', 'hospital', 'medicine', 'health',
+    'travel', 'vacation', 'tourist', 'trip'
+])
+
+# Problem indicators
+PROBLEM_INDICATORS_RE = keyword_pattern([
+    'help', 'issue', 'problem', 'error', 'bug', 'crash', 'fail', 'broken',
+    'not working', "can't", "won't", "doesn't work", 'troubleshoot',
+    'fix', 'solve', 'debug', 'stuck', 'struggling', 'how to', 'why', 'what'
+])
+
+# Non-problem exclusions
+NON_PROBLEM_RE = keyword_pattern([
+    'tutorial', 'guide', 'showcase', 'announcement', 'news',
+    'ama', 'discussion', 'just wanted to share', 'check out my'
+])
+
+# Categories are checked in order; the first one with a keyword hit wins
+CATEGORY_PATTERNS = [
+    ('Web Development', keyword_pattern(['html', 'css', 'javascript', 'react', 'angular', 'vue', 'nodejs', 'express', 'frontend', 'backend'])),
+    ('Mobile Development', keyword_pattern(['android', 'ios', 'react native', 'flutter', 'swift', 'kotlin', 'mobile app'])),
+    ('Software Development', keyword_pattern(['python', 'java', 'c++', 'c#', 'programming', 'algorithm', 'code', 'git'])),
+    ('System Administration', keyword_pattern(['linux', 'ubuntu', 'server', 'devops', 'deployment', 'docker', 'kubernetes'])),
+    ('Database', keyword_pattern(['mysql', 'postgresql', 'mongodb', 'sql', 'database', 'db'])),
+    ('Hardware/Performance', keyword_pattern(['performance', 'slow', 'memory', 'cpu', 'hardware', 'gpu', 'ram'])),
+    ('Cloud/DevOps', keyword_pattern(['aws', 'azure', 'cloud', 'docker', 'kubernetes', 'deployment', 'ci/cd'])),
+    ('Security', keyword_pattern(['security', 'auth', 'authentication', 'encryption', 'vulnerability', 'hack']))
+]
+
 class RAGPreprocessor:
     """Pre-process Reddit data for RAG system"""
     
-    def __init__(self):
+    def __init__(self, vector_store: Optional[VectorStore] = None):
         print("🚀 Initializing RAG Preprocessor...")
         
-        # Initialize components
+        # Initialize components (reuse the caller's store so the
+        # ChromaDB client and embedding model are only loaded once)
         self.reddit = _init_reddit()
-        self.vector_store = VectorStore()
+        self.vector_store = vector_store or VectorStore()
         
         # Processing stats
         self.total_attempted = 0
@@ -44,53 +95,15 @@ class RAGPreprocessor:
         """Enhanced problem detection with tech filtering"""
         text = f"{title} {body}".lower()
         
-        # Tech keywords (must have at least one)
-        tech_keywords = [
-            'python', 'javascript', 'java', 'c++', 'c#', 'react', 'angular', 'vue', 'node', 'php', 'html', 'css', 'sql',
-            'windows', 'linux', 'mac', 'android', 'ios', 'ubuntu', 'docker', 'kubernetes',
-            'git', 'vs code', 'postgresql', 'mysql', 'mongodb', 'api', 'aws', 'azure', 'github',
-            'error', 'crash', 'bug', 'fail', 'broken', 'timeout', 'exception',
-            'install', 'setup', 'configure', 'deploy', 'build', 'compile', 'debug', 'code', 'programming',
-            'software', 'hardware', 'computer', 'laptop', 'server', 'database', 'network', 'wifi'
-        ]
-        
         # Must have tech content
-        has_tech = any(keyword in text for keyword in tech_keywords)
-        if not has_tech:
+        if not TECH_KEYWORDS_RE.search(text):
             return False
         
-        # Exclude non-tech topics
-        non_tech_exclusions = [
-            'relationship', 'dating', 'girlfriend', 'boyfriend', 'marriage', 'divorce',
-            'politics', 'election', 'trump', 'biden', 'government', 'voting',
-            'religion', 'god', 'church', 'prayer', 'bible',
-            'sports', 'football', 'basketball', 'soccer', 'baseball',
-            'food', 'recipe', 'cooking', 'restaurant', 'eating',
-            'movie', 'netflix', 'tv show', 'celebrity', 'actor',
-            'weight loss', 'diet', 'fitness', 'workout', 'gym',
-            'medical', 'doctor', 'hospital', 'medicine', 'health',
-            'travel', 'vacation', 'tourist', 'trip'
-        ]
-        
-        for exclusion in non_tech_exclusions:
-            if exclusion in text:
-                return False
-        
-        # Problem indicators
-        problem_indicators = [
-            'help', 'issue', 'problem', 'error', 'bug', 'crash', 'fail', 'broken',
-            'not working', "can't", "won't", "doesn't work", 'troubleshoot',
-            'fix', 'solve', 'debug', 'stuck', 'struggling', 'how to', 'why', 'what'
-        ]
-        
-        # Non-problem exclusions
-        exclusions = [
-            'tutorial', 'guide', 'showcase', 'announcement', 'news',
-            'ama', 'discussion', 'just wanted to share', 'check out my'
-        ]
+        if NON_TECH_RE.search(text):
+            return False
         
-        has_problem = any(indicator in text for indicator in problem_indicators)
-        is_excluded = any(exclusion in text for exclusion in exclusions)
+        has_problem = PROBLEM_INDICATORS_RE.search(text) is not None
+        is_excluded = NON_PROBLEM_RE.search(text) is not None
         
         return has_problem and not is_excluded
     
@@ -98,54 +111,50 @@ class RAGPreprocessor:
         """Categorize tech posts"""
         text = f"{title} {body}".lower()
         
-        categories = {
-            'Web Development': ['html', 'css', 'javascript', 'react', 'angular', 'vue', 'nodejs', 'express', 'frontend', 'backend'],
-            'Mobile Development': ['android', 'ios', 'react native', 'flutter', 'swift', 'kotlin', 'mobile app'],
-            'Software Development': ['python', 'java', 'c++', 'c#', 'programming', 'algorithm', 'code', 'git'],
-            'System Administration': ['linux', 'ubuntu', 'server', 'devops', 'deployment', 'docker', 'kubernetes'],
-            'Database': ['mysql', 'postgresql', 'mongodb', 'sql', 'database', 'db'],
-            'Hardware/Performance': ['performance', 'slow', 'memory', 'cpu', 'hardware', 'gpu', 'ram'],
-            'Cloud/DevOps': ['aws', 'azure', 'cloud', 'docker', 'kubernetes', 'deployment', 'ci/cd'],
-            'Security': ['security', 'auth', 'authentication', 'encryption', 'vulnerability', 'hack']
-        }
-        
-        for category, keywords in categories.items():
-            if any(keyword in text for keyword in keywords):
+        for category, pattern in CATEGORY_PATTERNS:
+            if pattern.search(text):
                 return category
         
         return 'General Tech'
     
-    def process_single_post(self, post) -> Dict:
-        """Process a single Reddit post"""
+    def prepare_post(self, post) -> Optional[tuple]:
+        """Return (post, title, body) for a valid problem post, else None"""
         try:
             self.total_attempted += 1
             
             title = post.title.strip()
-            body = post.selftext.strip() if hasattr(post, 'selftext') else ""
+            body = (post.selftext or "").strip()
             
             # Skip if not a valid problem
             if not self.is_valid_problem_post(title, body):
                 return None
             
-            # Generate enhanced AI problem statement using new function
-            combined_text = f"{title}. {body}".strip()
-            ai_statement = generate_problem_statement(combined_text[:800])  # Use enhanced NLP function
+            return post, title, body
             
+        except Exception as e:
+            self.processing_errors += 1
+            print(f"❌ Error processing post: {e}")
+            return None
+    
+    def process_single_post(self, post, title: str, body: str, ai_statement: str, processed_at: str) -> Dict:
+        """Build the vector store document for a single Reddit post"""
+        try:
             # Categorize
             category = self.categorize_post(title, body)
             
             # Create document
             document = {
+                "reddit_id": post.id,
                 "title": title,
                 "description": body[:500] + "..." if len(body) > 500 else body,
                 "ai_problem_statement": ai_statement,
                 "category": category,
-                "subreddit": post.subreddit.display_name if hasattr(post.subreddit, 'display_name') else 'unknown',
+                "subreddit": post.subreddit.display_name,
                 "url": f"https://reddit.com{post.permalink}",
                 "created_utc": int(post.created_utc),
-                "processed_at": datetime.now().isoformat(),
-                "score": post.score if hasattr(post, 'score') else 0,
-                "num_comments": post.num_comments if hasattr(post, 'num_comments') else 0
+                "processed_at": processed_at,
+                "score": post.score,
+                "num_comments": post.num_comments
             }
             
             self.total_processed += 1
@@ -156,11 +165,9 @@ class RAGPreprocessor:
             print(f"❌ Error processing post: {e}")
             return None
     
-    def fetch_and_process_subreddit(self, subreddit_name: str, limit: int = 100) -> List[Dict]:
-        """Fetch and process posts from a single subreddit"""
+    def fetch_subreddit_posts(self, subreddit_name: str, limit: int = 100) -> List:
+        """Fetch hot/new/top listings for a single subreddit"""
         try:
-            print(f"📡 Processing r/{subreddit_name}...", end=" ")
-            
             subreddit = self.reddit.subreddit(subreddit_name)
             
             # Get posts from different sorting methods
@@ -180,24 +187,51 @@ class RAGPreprocessor:
                 all_posts.extend(top_posts)
                 
             except Exception as e:
-                print(f"Warning: {e}")
+                print(f"Warning (r/{subreddit_name}): {e}")
                 # Fallback to just hot
                 all_posts = list(subreddit.hot(limit=limit))
             
-            # Process posts
+            return all_posts
+            
+        except Exception as e:
+            print(f"❌ Error fetching r/{subreddit_name}: {e}")
+            return []
+    
+    def process_subreddit_posts(self, subreddit_name: str, all_posts: List) -> List[Dict]:
+        """Process already-fetched posts from a single subreddit"""
+        try:
+            print(f"📡 Processing r/{subreddit_name}...", end=" ")
+            
+            # hot/new/top overlap; drop repeats and posts already in the vector store
+            unique_posts = list({post.id: post for post in all_posts}.values())
+            known_ids = self.vector_store.existing_ids([post.id for post in unique_posts])
+            new_posts = [post for post in unique_posts if post.id not in known_ids]
+            
+            # Filter first, then generate all problem statements in one batch
+            candidates = [c for c in map(self.prepare_post, new_posts) if c]
+            statements = generate_problem_statements(
+                [f"{title}. {body}".strip()[:800] for _, title, body in candidates]
+            )
+            
+            # Process posts (one timestamp for the whole batch)
+            processed_at = datetime.now().isoformat()
             documents = []
-            for post in all_posts:
-                doc = self.process_single_post(post)
+            for (post, title, body), ai_statement in zip(candidates, statements):
+                doc = self.process_single_post(post, title, body, ai_statement, processed_at)
                 if doc:
                     documents.append(doc)
             
-            print(f"✅ {len(documents)} problems found")
+            print(f"✅ {len(documents)} problems found ({len(known_ids)} already stored)")
             return documents
             
         except Exception as e:
             print(f"❌ Error with r/{subreddit_name}: {e}")
             return []
     
+    def fetch_and_process_subreddit(self, subreddit_name: str, limit: int = 100) -> List[Dict]:
+        """Fetch and process posts from a single subreddit"""
+        return self.process_subreddit_posts(subreddit_name, self.fetch_subreddit_posts(subreddit_name, limit))
+    
     def run_full_preprocessing(self, posts_per_subreddit: int = 100) -> bool:
         """Run complete preprocessing pipeline"""
         try:
@@ -207,15 +241,20 @@ class RAGPreprocessor:
             start_time = time.time()
             all_documents = []
             
-            # Process each subreddit
-            for i, subreddit_name in enumerate(PAINPOINT_SUBREDDITS, 1):
-                print(f"[{i}/{len(PAINPOINT_SUBREDDITS)}] ", end="")
-                
-                subreddit_docs = self.fetch_and_process_subreddit(subreddit_name, posts_per_subreddit)
-                all_documents.extend(subreddit_docs)
+            # Listings for the next subreddits are fetched while the current one
+            # is processed; a single worker keeps every PRAW call on one thread
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                fetched = executor.map(
+                    lambda name: self.fetch_subreddit_posts(name, posts_per_subreddit),
+                    PAINPOINT_SUBREDDITS
+                )
                 
-                # Brief pause to be nice to Reddit API
-                time.sleep(0.5)
+                # Process each subreddit
+                for i, (subreddit_name, posts) in enumerate(zip(PAINPOINT_SUBREDDITS, fetched), 1):
+                    print(f"[{i}/{len(PAINPOINT_SUBREDDITS)}] ", end="")
+                    
+                    subreddit_docs = self.process_subreddit_posts(subreddit_name, posts)
+                    all_documents.extend(subreddit_docs)
             
             # Add to vector store
             if all_documents:
@@ -282,14 +321,16 @@ def main():
     print("🤖 RAG Preprocessing Script")
     print("=" * 50)
     
+    # Single vector store shared by the whole run
+    vs = VectorStore()
+    
     # Check if we should clear existing data
     if len(sys.argv) > 1 and sys.argv[1] == "--clear":
         print("🗑️ Clearing existing vector store...")
-        vs = VectorStore()
         vs.clear_collection()
     
     # Initialize preprocessor
-    preprocessor = RAGPreprocessor()
+    preprocessor = RAGPreprocessor(vector_store=vs)
     
     # Run preprocessing
     success = preprocessor.run_full_preprocessing(posts_per_subreddit=50)  # Reduced for faster testing
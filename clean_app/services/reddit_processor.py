@@ -10,6 +10,7 @@ import sys
 import json
 import time
 import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List
 
@@ -20,9 +21,68 @@ sys.path.append(parent_dir)
 sys.path.append(os.path.join(parent_dir, "backend"))
 
 from backend.app.utils.reddit_search import _init_reddit
+from backend.app.utils.keywords import keyword_pattern
 from backend.app.config.subreddits import PAINPOINT_SUBREDDITS
 from backend.app.services.nlp_processor import NLPProcessor, process_post
 
+# Number of (title, body) summaries kept between refreshes
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "4096"))
+
+# Filler words ignored when building a fallback summary from the title
+SKIP_WORDS = frozenset({'the', 'a', 'an', 'is', 'are', 'was', 'were', 'have', 'has', 'had', 'will', 'would', 'could', 'should'})
+
+# Tech keywords (a post must mention at least one)
+TECH_KEYWORDS_RE = keyword_pattern([
+    'python', 'javascript', 'java', 'c++', 'c#', 'react', 'angular', 'vue', 'node', 'php', 'html', 'css', 'sql',
+    'windows', 'linux', 'mac', 'android', 'ios', 'ubuntu', 'docker', 'kubernetes',
+    'git', 'vs code', 'postgresql', 'mysql', 'mongodb', 'api', 'aws', 'azure', 'github',
+    'error', 'crash', 'bug', 'fail', 'broken', 'timeout', 'exception',
+    'install', 'setup', 'configure', 'deploy', 'build', 'compile', 'debug', 'code', 'programming',
+    'software', 'hardware', 'computer', 'laptop', 'server', 'database', 'network', 'wifi'
+])
+
+# Non-tech topics are excluded completely
+NON_TECH_RE = keyword_pattern([
+    'relationship', 'dating', 'girlfriend', 'boyfriend', 'marriage', 'divorce',
+    'politics', 'election', 'trump', 'biden', 'government', 'voting',
+    'religion', 'god', 'church', 'prayer', 'bible',
+    'sports', 'football', 'basketball', 'soccer', 'baseball',
+    'food', 'recipe', 'cooking', 'restaurant', 'eating',
+    'movie', 'netflix', 'tv show', 'celebrity', 'actor',
+    'weight loss', 'diet', 'fitness', 'workout', 'gym',
+    'medical', 'doctor', 'hospital', 'medicine', 'health',
+    'travel', 'vacation', 'tourist', 'trip',
+    'money', 'investment', 'stock', 'crypto trading', 'finance',
+    'school homework', 'college assignment', 'university project'
+])
+
+# Strong problem indicators
+PROBLEM_INDICATORS_RE = keyword_pattern([
+    'help', 'issue', 'problem', 'error', 'bug', 'crash', 'fail', 'broken',
+    'not working', "can't", "won't", "doesn't work", 'troubleshoot',
+    'fix', 'solve', 'debug', 'stuck', 'struggling'
+])
+
+# Non-problem posts
+NON_PROBLEM_RE = keyword_pattern([
+    'tutorial', 'guide', 'showcase', 'announcement', 'news',
+    'ama', 'discussion', 'what do you think', 'opinion',
+    'just wanted to share', 'check out my'
+])
+
+# Posts with questions often indicate problems
+QUESTION_RE = keyword_pattern(['how to', 'how do', 'why', 'what', '?'])
+
+# First matching category wins
+CATEGORY_PATTERNS = [
+    ('Web Development', keyword_pattern(['html', 'css', 'javascript', 'react', 'angular', 'vue', 'nodejs', 'express'])),
+    ('Mobile Development', keyword_pattern(['android', 'ios', 'react native', 'flutter', 'swift', 'kotlin'])),
+    ('Software Development', keyword_pattern(['python', 'java', 'c++', 'c#', 'programming', 'algorithm'])),
+    ('System Administration', keyword_pattern(['linux', 'ubuntu', 'server', 'devops', 'deployment', 'docker'])),
+    ('Database', keyword_pattern(['mysql', 'postgresql', 'mongodb', 'sql', 'database'])),
+    ('Hardware/Performance', keyword_pattern(['performance', 'slow', 'memory', 'cpu', 'hardware']))
+]
+
 class BackgroundRedditProcessor:
     """Background processor that pre-fetches and processes Reddit posts"""
     
@@ -34,6 +94,14 @@ class BackgroundRedditProcessor:
         self.last_update = None
         self.is_processing = False
         
+        # Single-flight state: callers arriving during a run share its result
+        self._flight_lock = threading.Lock()
+        self._flight = None
+        
+        # Hot posts stay hot across refreshes; reuse their AI summaries.
+        # Fallbacks are never stored so a failed post gets retried next run
+        self._summary_cache = OrderedDict()
+        
     def truncate_for_nlp(self, text: str, max_chars: int = 800) -> str:
         """Truncate text to prevent token length errors"""
         if len(text) <= max_chars:
@@ -49,6 +117,12 @@ class BackgroundRedditProcessor:
     
     def generate_ai_summary(self, title: str, body: str = "") -> str:
         """Generate AI summary using the proven process_post function"""
+        cache_key = (title, body)
+        cached = self._summary_cache.get(cache_key)
+        if cached is not None:
+            self._summary_cache.move_to_end(cache_key)
+            return cached
+        
         try:
             # Combine and clean text
             combined_text = f"{title}. {body}".strip()
@@ -62,7 +136,11 @@ class BackgroundRedditProcessor:
             # Validate result
             if result and len(result.strip()) > 5 and result.strip() != safe_text.strip():
                 print(f"✅ AI: {result[:50]}...")
-                return result.strip()
+                summary = result.strip()
+                self._summary_cache[cache_key] = summary
+                if len(self._summary_cache) > SUMMARY_CACHE_SIZE:
+                    self._summary_cache.popitem(last=False)
+                return summary
             else:
                 print("⚠️ AI validation failed, using enhanced fallback...")
                 fallback = self.create_enhanced_fallback(title, body)
@@ -124,11 +202,9 @@ class BackgroundRedditProcessor:
         else:
             # Extract meaningful words from title
             title_words = []
-            skip_words = {'the', 'a', 'an', 'is', 'are', 'was', 'were', 'have', 'has', 'had', 'will', 'would', 'could', 'should'}
-            
             for word in title.lower().split():
                 clean_word = ''.join(c for c in word if c.isalnum())
-                if clean_word and len(clean_word) > 2 and clean_word not in skip_words:
+                if clean_word and len(clean_word) > 2 and clean_word not in SKIP_WORDS:
                     title_words.append(clean_word)
             
             if title_words:
@@ -144,59 +220,16 @@ class BackgroundRedditProcessor:
         text = f"{title} {body}".lower()
         
         # FIRST: Check if it's tech-related at all
-        tech_keywords = [
-            'python', 'javascript', 'java', 'c++', 'c#', 'react', 'angular', 'vue', 'node', 'php', 'html', 'css', 'sql',
-            'windows', 'linux', 'mac', 'android', 'ios', 'ubuntu', 'docker', 'kubernetes',
-            'git', 'vs code', 'postgresql', 'mysql', 'mongodb', 'api', 'aws', 'azure', 'github',
-            'error', 'crash', 'bug', 'fail', 'broken', 'timeout', 'exception',
-            'install', 'setup', 'configure', 'deploy', 'build', 'compile', 'debug', 'code', 'programming',
-            'software', 'hardware', 'computer', 'laptop', 'server', 'database', 'network', 'wifi'
-        ]
-        
-        # Must have at least one tech keyword
-        has_tech = any(keyword in text for keyword in tech_keywords)
-        if not has_tech:
+        if not TECH_KEYWORDS_RE.search(text):
             return False
         
-        # EXCLUDE non-tech topics completely
-        non_tech_exclusions = [
-            'relationship', 'dating', 'girlfriend', 'boyfriend', 'marriage', 'divorce',
-            'politics', 'election', 'trump', 'biden', 'government', 'voting',
-            'religion', 'god', 'church', 'prayer', 'bible',
-            'sports', 'football', 'basketball', 'soccer', 'baseball',
-            'food', 'recipe', 'cooking', 'restaurant', 'eating',
-            'movie', 'netflix', 'tv show', 'celebrity', 'actor',
-            'weight loss', 'diet', 'fitness', 'workout', 'gym',
-            'medical', 'doctor', 'hospital', 'medicine', 'health',
-            'travel', 'vacation', 'tourist', 'trip',
-            'money', 'investment', 'stock', 'crypto trading', 'finance',
-            'school homework', 'college assignment', 'university project'
-        ]
-        
         # If contains non-tech content, exclude
-        for exclusion in non_tech_exclusions:
-            if exclusion in text:
-                return False
-        
-        # Strong problem indicators
-        problem_indicators = [
-            'help', 'issue', 'problem', 'error', 'bug', 'crash', 'fail', 'broken',
-            'not working', "can't", "won't", "doesn't work", 'troubleshoot',
-            'fix', 'solve', 'debug', 'stuck', 'struggling'
-        ]
-        
-        # Exclude non-problems
-        exclusions = [
-            'tutorial', 'guide', 'showcase', 'announcement', 'news',
-            'ama', 'discussion', 'what do you think', 'opinion',
-            'just wanted to share', 'check out my'
-        ]
-        
-        has_problem = any(indicator in text for indicator in problem_indicators)
-        is_excluded = any(exclusion in text for exclusion in exclusions)
+        if NON_TECH_RE.search(text):
+            return False
         
-        # Additional check: posts with questions often indicate problems
-        has_question = any(word in text for word in ['how to', 'how do', 'why', 'what', '?'])
+        has_problem = PROBLEM_INDICATORS_RE.search(text) is not None
+        is_excluded = NON_PROBLEM_RE.search(text) is not None
+        has_question = QUESTION_RE.search(text) is not None
         
         return (has_problem or has_question) and not is_excluded
     
@@ -204,17 +237,8 @@ class BackgroundRedditProcessor:
         """Enhanced categorization"""
         text = f"{title} {body}".lower()
         
-        categories = {
-            'Web Development': ['html', 'css', 'javascript', 'react', 'angular', 'vue', 'nodejs', 'express'],
-            'Mobile Development': ['android', 'ios', 'react native', 'flutter', 'swift', 'kotlin'],
-            'Software Development': ['python', 'java', 'c++', 'c#', 'programming', 'algorithm'],
-            'System Administration': ['linux', 'ubuntu', 'server', 'devops', 'deployment', 'docker'],
-            'Database': ['mysql', 'postgresql', 'mongodb', 'sql', 'database'],
-            'Hardware/Performance': ['performance', 'slow', 'memory', 'cpu', 'hardware']
-        }
-        
-        for category, keywords in categories.items():
-            if any(keyword in text for keyword in keywords):
+        for category, pattern in CATEGORY_PATTERNS:
+            if pattern.search(text):
                 return category
         
         return 'General Tech'
@@ -245,11 +269,14 @@ class BackgroundRedditProcessor:
                 
                 problems_found = 0
                 
+                # One timestamp for the whole subreddit batch
+                processed_at = datetime.now().isoformat()
+                
                 for post in posts:
                     total_attempted += 1
                     
                     title = post.title.strip()
-                    body = post.selftext.strip() if hasattr(post, 'selftext') else ""
+                    body = (post.selftext or "").strip()
                     
                     # Skip if not a problem
                     if not self.is_valid_problem_post(title, body):
@@ -269,8 +296,8 @@ class BackgroundRedditProcessor:
                         "subreddit": subreddit_name,
                         "url": f"https://reddit.com{post.permalink}",
                         "created_utc": int(post.created_utc),
-                        "processed_at": datetime.now().isoformat(),
-                        "score": post.score if hasattr(post, 'score') else 0
+                        "processed_at": processed_at,
+                        "score": post.score
                     }
                     
                     categories[category].append(problem)
@@ -309,44 +336,76 @@ class BackgroundRedditProcessor:
         except Exception as e:
             print(f"❌ Cache save error: {e}")
     
-    def load_cache(self) -> Dict:
-        """Load processed data from cache"""
+    def _read_cache_file(self) -> Dict:
+        """Read the cache file regardless of age"""
         try:
             if os.path.exists(self.cache_file):
                 with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                # Check if cache is still fresh (2 hours)
-                cached_time = datetime.fromisoformat(data['processed_at'])
-                if datetime.now() - cached_time < timedelta(hours=2):
-                    print("📦 Using fresh cache")
-                    return data
-                else:
-                    print("⏰ Cache expired, will refresh")
-            
+                    return json.load(f)
             return None
         except Exception as e:
             print(f"❌ Cache load error: {e}")
             return None
     
+    def _is_cache_fresh(self, data: Dict) -> bool:
+        """Check if cached data is still fresh (2 hours)"""
+        try:
+            cached_time = datetime.fromisoformat(data['processed_at'])
+            return datetime.now() - cached_time < timedelta(hours=2)
+        except Exception as e:
+            print(f"❌ Cache load error: {e}")
+            return False
+    
+    def _process_fresh(self) -> Dict:
+        """Run a full fetch + NLP pass, sharing one run between concurrent callers"""
+        with self._flight_lock:
+            flight = self._flight
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flight = {"done": threading.Event(), "result": None}
+        
+        if not is_leader:
+            print("⏳ Processing already in progress, waiting for its result...")
+            flight["done"].wait()
+            return flight["result"] or {"error": "Processing failed"}
+        
+        self.is_processing = True
+        try:
+            fresh_data = self.fetch_and_process_all_posts()
+            self.save_cache(fresh_data)
+            flight["result"] = fresh_data
+            return fresh_data
+        finally:
+            self.is_processing = False
+            with self._flight_lock:
+                self._flight = None
+            flight["done"].set()
+    
+    def refresh_in_background(self):
+        """Kick off a fresh processing run on a daemon thread (no-op if one is running)"""
+        with self._flight_lock:
+            if self._flight is not None:
+                return
+        
+        threading.Thread(target=self._process_fresh, daemon=True).start()
+        print("🔄 Background refresh scheduled")
+    
     def get_processed_posts(self) -> Dict:
         """Get processed posts (from cache or fresh processing)"""
         # Try cache first
-        cached_data = self.load_cache()
+        cached_data = self._read_cache_file()
+        if cached_data and self._is_cache_fresh(cached_data):
+            print("📦 Using fresh cache")
+            return cached_data
+        
+        # Expired cache: serve it now and refresh without blocking the caller
         if cached_data:
+            print("⏰ Cache expired, serving it while refreshing in the background")
+            self.refresh_in_background()
             return cached_data
         
-        # If no valid cache, process fresh
-        if not self.is_processing:
-            self.is_processing = True
-            try:
-                fresh_data = self.fetch_and_process_all_posts()
-                self.save_cache(fresh_data)
-                return fresh_data
-            finally:
-                self.is_processing = False
-        else:
-            return {"error": "Processing in progress"}
+        # No cache at all: nothing to serve, so process fresh
+        return self._process_fresh()
     
     def start_background_refresh(self):
         """Start background thread to refresh cache periodically"""
@@ -355,8 +414,7 @@ class BackgroundRedditProcessor:
                 time.sleep(7200)  # Refresh every 2 hours
                 print("🔄 Background refresh starting...")
                 try:
-                    fresh_data = self.fetch_and_process_all_posts()
-                    self.save_cache(fresh_data)
+                    self._process_fresh()
                     print("✅ Background refresh complete")
                 except Exception as e:
                     print(f"❌ Background refresh error: {e}")